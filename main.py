@@ -1,29 +1,21 @@
 # main.py (修正版)
 
-import json
+import atexit
+import os
+import re
 import sys
-import sqlite3
-import codecs # 引用 codecs 模組
+from functools import cache, lru_cache
+from itertools import islice
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 import typer
-from colorama import Fore, Style, init
-from datetime import datetime, timezone
-from collections import Counter
-
-# --- 核心模組 ---
-from scheduler import update_review_schedule
-from planner import get_daily_plan
 
 # 【修正點】: 強制將標準輸出/錯誤流的編碼設為 UTF-8
-# 這可以解決在 Windows cmd 中輸出 Unicode 字元（如 Emoji）時的編碼錯誤問題
-if sys.stdout.encoding != 'utf-8':
-    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
-if sys.stderr.encoding != 'utf-8':
-    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
-
-# 初始化 colorama，autoreset=True 確保每個 print 後樣式都會重設
-init(autoreset=True)
+# 這可以解決在 Windows cmd 中輸出 Unicode 字元（如 Emoji）時的編碼錯誤問題。
+# 已是 UTF-8 時 (POSIX 上的常態) 直接略過；reconfigure 就地切換編碼，不必匯入 codecs 包裝串流。
+for _stream in (sys.stdout, sys.stderr):
+    if _stream is not None and (_stream.encoding or '').lower() != 'utf-8' and hasattr(_stream, 'reconfigure'):
+        _stream.reconfigure(encoding='utf-8')
 
 # --- 常數定義 ---
 CWD = Path(__file__).parent
@@ -32,48 +24,238 @@ TASKS_FILE = CWD / "tasks.json"
 RESOURCES_FILE = CWD / "resources.json"
 LOG_FILE = CWD / "log.json"
 DB_FILE = CWD / "study_data.db"
+NEXT_ID_FILE = CWD / "tasks.json.nextid"  # 快取下一個任務 ID，避免每次新增都掃描全部任務
+APPEND_TAIL_BYTES = 4096  # append_record 尋找結尾 `]` 時讀取的檔案尾端大小
+PERFORMANCE_CHOICES = ('good', 'ok', 'bad')
+EXPORT_BATCH_SIZE = 10_000  # 匯出 SQLite 時每次 executemany 寫入的筆數
 
 # --- 樣式常數 ---
-HEADER = Style.BRIGHT + Fore.MAGENTA
-SUB_HEADER = Style.BRIGHT + Fore.CYAN
-SUCCESS = Fore.GREEN
-ERROR = Fore.RED
-WARNING = Fore.YELLOW
-INFO = Fore.CYAN
-KEY = Fore.BLUE
-DIM = Style.DIM
+# 直接使用 ANSI 跳脫序列，不再讓 colorama 包裝 stdout 攔截每一次輸出。
+# 輸出不是終端機 (導向檔案或管線) 時一律為空字串，與先前 colorama 自動移除色碼的行為一致。
+_USE_COLOR = sys.stdout.isatty()
+
+def _ansi(code: str) -> str:
+    """回傳指定 SGR 代碼的 ANSI 跳脫序列；不輸出色彩時回傳空字串。"""
+    return f"\x1b[{code}m" if _USE_COLOR else ""
+
+RESET = _ansi("0")
+BOLD = _ansi("1")
+DIM = _ansi("2")
+RED = _ansi("31")
+GREEN = _ansi("32")
+YELLOW = _ansi("33")
+BLUE = _ansi("34")
+MAGENTA = _ansi("35")
+CYAN = _ansi("36")
+WHITE = _ansi("37")
+
+HEADER = BOLD + MAGENTA
+SUB_HEADER = BOLD + CYAN
+SUCCESS = GREEN
+ERROR = RED
+WARNING = YELLOW
+INFO = CYAN
+KEY = BLUE
+
+def _init_style() -> None:
+    """Windows 主控台預設不解析 ANSI 跳脫序列，需先開啟 VT 處理；其他平台不需任何動作。"""
+    if sys.platform != 'win32' or not _USE_COLOR:
+        return
+    try:
+        from colorama import just_fix_windows_console
+    except ImportError:
+        os.system('')  # 在 Windows 10 以上會順帶開啟主控台的 VT 處理
+    else:
+        just_fix_windows_console()
+
+def _echo(text: str = ""):
+    """輸出一行文字並在結尾重設樣式，取代原本 colorama 的 autoreset。"""
+    print(text + RESET)
 
 
 # --- 輔助函式 (檔案處理) ---
 
+@cache
+def _orjson():
+    """
+    延遲載入選用的 orjson 模組；未安裝時回傳 None，由呼叫端退回標準函式庫的 json。
+    只在第一次讀寫 JSON 時才匯入，`--help` 等不碰資料的路徑不必付出這個成本。
+    """
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
 def load_data(filepath: Path) -> Any:
-    """載入 JSON 檔案並回傳其內容。若檔案不存在或格式錯誤，則回傳空列表。"""
+    """
+    載入 JSON 檔案並回傳其內容。若檔案不存在或格式錯誤，則回傳空列表。
+
+    同一個行程內的解析結果會以檔案的修改時間為鍵快取，檔案變動後自動失效。
+    回傳的物件與快取共用，呼叫端只能讀取；需要修改內容時請改用 _read_data 取得獨立的一份。
+    """
+    return _load_data_cached(str(filepath), _mtime_ns(filepath))
+
+def _mtime_ns(filepath: Path) -> int:
+    """回傳檔案的修改時間 (奈秒)，作為快取鍵使用；檔案不存在時回傳 0。"""
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return filepath.stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+@lru_cache(maxsize=None)
+def _load_data_cached(path: str, mtime_ns: int) -> Any:
+    """load_data 的快取層，以 (路徑, 修改時間) 為鍵保存 _read_data 的結果。"""
+    return _read_data(Path(path))
+
+def _read_data(filepath: Path) -> Any:
+    """不經快取直接讀取並解析 JSON 檔案；每次呼叫都回傳全新的物件，可由呼叫端自由修改。"""
+    import json
+    try:
+        # 一次讀入整個檔案的 bytes，交由 C 實作的解析器同時處理 UTF-8 解碼與 JSON 解析
+        raw = filepath.read_bytes()
+        orjson = _orjson()
+        return orjson.loads(raw) if orjson else json.loads(raw)
     except FileNotFoundError:
         if filepath != LOG_FILE:
-            print(WARNING + f"警告：找不到檔案 {filepath}。將視為空檔案處理。")
+            _echo(WARNING + f"警告：找不到檔案 {filepath}。將視為空檔案處理。")
         return []
     except json.JSONDecodeError:
-        print(ERROR + f"錯誤：檔案 {filepath} 格式不正確。")
+        _echo(ERROR + f"錯誤：檔案 {filepath} 格式不正確。")
         sys.exit(1)
 
+def _dump_json(data: Any) -> bytes:
+    """將資料序列化為縮排 2 格的 UTF-8 JSON bytes；有安裝 orjson 時優先使用。"""
+    orjson = _orjson()
+    if orjson:
+        # orjson 原生輸出 UTF-8，OPT_INDENT_2 與 json 的 indent=2 格式一致
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    import json
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
 def save_data(filepath: Path, data: Any):
     """將資料以美觀的 JSON 格式儲存至檔案。"""
     try:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        with open(filepath, 'wb') as f:
+            f.write(_dump_json(data))
+    except IOError as e:
+        _echo(ERROR + f"錯誤：無法寫入檔案 {filepath}。錯誤訊息：{e}")
+        sys.exit(1)
+    finally:
+        # 檔案系統的時間精度可能不足以反映這次寫入，直接清除快取最保險
+        _load_data_cached.cache_clear()
+
+def _print_lines(lines: List[str]):
+    """
+    一次寫出多行輸出。每行結尾各自重設樣式，效果等同逐行呼叫 _echo，
+    但整批只經過一次 stdout 寫入。
+    """
+    sys.stdout.write("".join(line + RESET + "\n" for line in lines))
+
+def append_record(filepath: Path, record: Dict[str, Any], key: Optional[str] = None) -> bool:
+    """
+    將一筆紀錄就地附加到 JSON 陣列檔案的結尾，不必讀取與重寫整個檔案。
+
+    預設檔案內容為頂層陣列 (例如 tasks.json)；若指定 key，則檔案應為
+    `{"<key>": [...]}` 形式的單鍵物件 (例如 log.json)，紀錄會附加到該陣列。
+    只會改寫檔案結尾的括號。若檔案不存在或結構不符，則不做任何變更並回傳 False，
+    由呼叫端改用 save_data 完整寫入。
+    """
+    depth = 1 if key is None else 2
+    closing = b']' if key is None else b'  ]\n}'
+    try:
+        with open(filepath, 'r+b') as f:
+            if key is not None:
+                head = f.read(len(key) + 64)
+                if not re.match(rb'\s*\{\s*"' + re.escape(key.encode('utf-8')) + rb'"\s*:', head):
+                    return False
+            size = f.seek(0, os.SEEK_END)
+            tail_start = max(0, size - APPEND_TAIL_BYTES)
+            f.seek(tail_start)
+            tail = f.read().rstrip()
+            if key is not None:
+                if not tail.endswith(b'}'):
+                    return False
+                tail = tail[:-1].rstrip()
+            if not tail.endswith(b']'):
+                return False
+            body = tail[:-1].rstrip()
+            if not body:
+                return False
+
+            # 縮排與 save_data 的輸出一致：每層縮排 2 格
+            indent = b'\n' + b'  ' * depth
+            entry = indent + _dump_json(record).replace(b'\n', indent) + b'\n' + closing
+            if not body.endswith(b'['):
+                entry = b',' + entry
+            f.seek(tail_start + len(body))
+            f.write(entry)
+            f.truncate()
+    except FileNotFoundError:
+        return False
     except IOError as e:
-        print(ERROR + f"錯誤：無法寫入檔案 {filepath}。錯誤訊息：{e}")
+        _echo(ERROR + f"錯誤：無法寫入檔案 {filepath}。錯誤訊息：{e}")
         sys.exit(1)
+    _load_data_cached.cache_clear()
+    return True
+
+def next_log_id() -> int:
+    """
+    回傳下一個可用的日誌 ID。
+
+    日誌依序附加，最後一筆的 log_id 即為最大值，因此先從 log.json 尾端尋找；
+    找不到時 (例如最後一筆紀錄過長) 才載入整個日誌計算。
+    """
+    try:
+        with open(LOG_FILE, 'rb') as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - APPEND_TAIL_BYTES))
+            log_ids = re.findall(rb'"log_id":\s*(\d+)', f.read())
+        if log_ids:
+            return int(log_ids[-1]) + 1
+    except FileNotFoundError:
+        return 1
+    log_data = load_data(LOG_FILE)
+    logs = log_data.get("logs", []) if isinstance(log_data, dict) else []
+    return max((log.get('log_id', 0) for log in logs), default=0) + 1
 
 
 # --- Typer 應用程式實例化 ---
 
-app = typer.Typer(help="學測致勝系統 CLI - 您的個人化學習引擎")
+APP_COMMANDS = ("export-sqlite", "show-id", "status", "plan", "show-subjects", "task")
+TASK_COMMANDS = ("list", "add", "add-batch", "complete")
+
+def _sniff_subcommand(args: List[str], known: tuple) -> Optional[str]:
+    """找出參數列中第一個非選項的字詞；若它是已知的子命令則回傳，否則回傳 None。"""
+    invoked = next((arg for arg in args if not arg.startswith('-')), None)
+    return invoked if invoked in known else None
+
+# 直接執行時只註冊實際被呼叫的命令，省去為其他命令建構 Click 解析器的成本。
+# 未指定命令、命令名稱錯誤 (需要完整的命令列表與提示)，或被其他模組匯入時，則全部註冊。
+_ARGV = sys.argv[1:] if __name__ == '__main__' else []
+_INVOKED = _sniff_subcommand(_ARGV, APP_COMMANDS)
+_INVOKED_TASK = _sniff_subcommand(_ARGV[_ARGV.index("task") + 1:], TASK_COMMANDS) if _INVOKED == "task" else None
+
+app = typer.Typer(help="學測致勝系統 CLI - 您的個人化學習引擎", add_completion=False)
 task_app = typer.Typer(help="管理您的學習任務")
-app.add_typer(task_app, name="task")
+if _INVOKED in (None, "task"):
+    app.add_typer(task_app, name="task")
+
+def _command(typer_app: typer.Typer, name: str):
+    """等同於 `typer_app.command(name=name)`，但只在該命令會被呼叫時才向 Typer 註冊。"""
+    invoked = _INVOKED_TASK if typer_app is task_app else _INVOKED
+
+    def decorator(func):
+        if invoked is None or invoked == name:
+            return typer_app.command(name=name)(func)
+        return func
+    return decorator
+
+
+@app.callback()
+def _main():
+    # 所有命令執行前的共同初始化；`--help` 不會觸發此處。
+    _init_style()
 
 
 # --- 核心邏輯函式 ---
@@ -85,20 +267,184 @@ def get_subjects_dict() -> Dict[str, Dict]:
         return {s['id']: s for s in subjects_data['subjects']}
     return {}
 
+def get_subject_names() -> Dict[str, str]:
+    """回傳 {學科 ID: 學科名稱} 的對照表，讓逐列輸出時只需一次字典查找。"""
+    return {subject_id: s.get('name', '未知科目') for subject_id, s in get_subjects_dict().items()}
+
+def _task_rows(tasks: List[Dict[str, Any]]):
+    """逐筆產出對應 tasks 資料表欄位順序的資料列，避免一次在記憶體中建立全部 tuple。"""
+    for t in tasks:
+        yield (
+            t['task_id'], t['subject_id'], t['description'], t.get('resource_code'),
+            t['status'], t['type'], t.get('due_date'),
+            1 if t.get('peak_time_required') else 0,
+            t.get('last_review_date'), t.get('next_review_date'),
+            t.get('review_interval')
+        )
+
+def _batched(rows, size: int):
+    """將可迭代的資料列切成每批最多 size 筆的列表，依序產出。"""
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+def create_schema(cursor) -> None:
+    """
+    建立 SQLite 資料庫的資料表與索引 (若尚未存在)。
+
+    tasks 表在 (status, subject_id) 上建有索引，讓「各科待辦數量」這類
+    `WHERE status = ? GROUP BY subject_id` 查詢可以直接走索引。
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS subjects (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            status TEXT,
+            description TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tasks (
+            task_id INTEGER PRIMARY KEY,
+            subject_id TEXT,
+            description TEXT NOT NULL,
+            resource_code TEXT,
+            status TEXT,
+            type TEXT,
+            due_date TEXT,
+            peak_time_required INTEGER,
+            last_review_date TEXT,
+            next_review_date TEXT,
+            review_interval INTEGER,
+            FOREIGN KEY (subject_id) REFERENCES subjects (id)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status_subject ON tasks (status, subject_id)")
+
+def next_task_id() -> int:
+    """
+    回傳下一個可用的任務 ID。
+
+    優先讀取 NEXT_ID_FILE；它同時記錄了寫入當下 tasks.json 的大小與修改時間，
+    只要 tasks.json 在那之後被其他方式改動過 (或快取不存在)，就退回掃描全部任務一次。
+    """
+    try:
+        stat = TASKS_FILE.stat()
+        next_id, size, mtime_ns = map(int, NEXT_ID_FILE.read_text(encoding='utf-8').split())
+        if (size, mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+            return next_id
+    except (FileNotFoundError, ValueError):
+        pass
+    tasks = load_data(TASKS_FILE)
+    return max((task.get('task_id', 0) for task in tasks), default=0) + 1
+
+def _save_next_task_id(next_id: int):
+    """以原子替換的方式更新 NEXT_ID_FILE，並記下目前 tasks.json 的大小與修改時間。"""
+    stat = TASKS_FILE.stat()
+    tmp_file = NEXT_ID_FILE.with_name(NEXT_ID_FILE.name + ".tmp")
+    tmp_file.write_text(f"{next_id} {stat.st_size} {stat.st_mtime_ns}", encoding='utf-8')
+    os.replace(tmp_file, NEXT_ID_FILE)
+
+# --- 行程內共用的任務列表 ---
+# 同一個行程內多次操作任務時 (例如 stress_test 或批次新增) 共用同一份列表，
+# 有變更時只需寫回 tasks.json 一次；行程結束前若仍有未寫回的變更也會自動寫入。
+_tasks_cache: Optional[List[Dict[str, Any]]] = None
+_tasks_dirty = False
+_max_task_id = 0  # 共用列表中目前最大的任務 ID，載入時計算一次，之後隨新增遞增
+
+def get_tasks() -> List[Dict[str, Any]]:
+    """回傳行程內共用的任務列表；第一次呼叫時才從 tasks.json 載入。"""
+    global _tasks_cache, _max_task_id
+    if _tasks_cache is None:
+        # 共用列表會被就地修改，因此另外解析一份，避免改動到 load_data 的快取。
+        # 檔案不存在時改用 load_data 的空列表 (複製一份)，同一行程內只會警告一次。
+        _tasks_cache = _read_data(TASKS_FILE) if TASKS_FILE.exists() else list(load_data(TASKS_FILE))
+        _max_task_id = max((task.get('task_id', 0) for task in _tasks_cache), default=0)
+    return _tasks_cache
+
+def mark_tasks_dirty():
+    """標記共用的任務列表已被修改，需要寫回 tasks.json。"""
+    global _tasks_dirty
+    _tasks_dirty = True
+
+def flush_tasks():
+    """若共用的任務列表有尚未寫回的變更，將其寫入 tasks.json。"""
+    global _tasks_dirty
+    if _tasks_dirty and _tasks_cache is not None:
+        save_data(TASKS_FILE, _tasks_cache)
+        _tasks_dirty = False
+
+atexit.register(flush_tasks)
+
+def build_task(task_id: int, description: str, subject_id: str, task_type: str = "study",
+               resource_code: Optional[str] = None, due_date: Optional[str] = None) -> Dict[str, Any]:
+    """建立一筆狀態為 'todo'、尚未排入複習的新任務字典 (不寫入任何檔案)。"""
+    return {
+        "task_id": task_id, "subject_id": subject_id, "description": description, "resource_code": resource_code,
+        "status": "todo", "type": task_type.lower(), "due_date": due_date, "peak_time_required": False,
+        "last_review_date": None, "next_review_date": None, "review_interval": 0
+    }
+
+def create_task(description: str, subject_id: str, **options) -> Dict[str, Any]:
+    """
+    在行程內共用的任務列表 (見 get_tasks) 新增一筆任務並回傳之。
+
+    新 ID 由快取的最大 ID 遞增而來，不必掃描整個列表。此函式不會立即寫入檔案，
+    呼叫端可連續新增多筆後再以 flush_tasks 一次寫入。
+    options 會原樣傳給 build_task (task_type、resource_code、due_date)。
+    """
+    global _max_task_id
+    tasks = get_tasks()
+    _max_task_id += 1
+    new_task = build_task(_max_task_id, description, subject_id, **options)
+    tasks.append(new_task)
+    mark_tasks_dirty()
+    return new_task
+
+def apply_completion(task: Dict[str, Any], log_id: int, performance: str,
+                     duration_minutes: int, notes: str = "") -> Dict[str, Any]:
+    """
+    將一次學習或複習的結果套用到任務上，並回傳對應的日誌紀錄。
+
+    從未複習過的任務會標記為 'done'，接著依表現更新複習排程。
+    任務字典會被就地修改；兩者都不會寫入檔案，由呼叫端負責儲存。
+    """
+    from datetime import datetime, timezone
+    from scheduler import update_review_schedule
+
+    activity_type = "review" if task.get('review_interval', 0) > 0 else "new_study"
+    if activity_type == "new_study": task['status'] = 'done'
+
+    new_log = {
+        "log_id": log_id, "task_id": task['task_id'], "timestamp": datetime.now(timezone.utc).isoformat(),
+        "activity_type": activity_type, "duration_minutes": duration_minutes, "performance": performance, "notes": notes
+    }
+    update_review_schedule(task, performance)
+    return new_log
+
+def _parse_performance(value: str) -> str:
+    """將表現評分正規化為小寫；不在 PERFORMANCE_CHOICES 之中時拋出 BadParameter。"""
+    performance = value.strip().lower()
+    if performance not in PERFORMANCE_CHOICES:
+        raise typer.BadParameter(f"無效的輸入，請輸入 {', '.join(PERFORMANCE_CHOICES)} 其中之一。")
+    return performance
+
 # --- Typer 命令定義 ---
 
-@app.command(name="export-sqlite")
+@_command(app, "export-sqlite")
 def export_to_sqlite():
     """
     將 subjects.json 和 tasks.json 的資料匯出至 SQLite 資料庫。
     """
-    print(HEADER + f"--- 正在將資料匯出至 {DB_FILE.name} ---")
+    import sqlite3
+
+    _echo(HEADER + f"--- 正在將資料匯出至 {DB_FILE.name} ---")
 
     subjects_data = load_data(SUBJECTS_FILE)
     tasks_data = load_data(TASKS_FILE)
 
     if not isinstance(subjects_data, dict) or 'subjects' not in subjects_data:
-        print(ERROR + "subjects.json 格式不正確或為空，無法匯出。")
+        _echo(ERROR + "subjects.json 格式不正確或為空，無法匯出。")
         raise typer.Exit()
     
     subjects = subjects_data['subjects']
@@ -107,205 +453,194 @@ def export_to_sqlite():
         with sqlite3.connect(DB_FILE) as conn:
             cursor = conn.cursor()
 
-            # --- 處理 Subjects 表 ---
+            # 匯出是整份重建，中途失敗重跑即可，因此關閉 fsync 與磁碟日誌以加速大量寫入；
+            # 所有寫入包在同一個交易中，只在最後 commit 一次。
+            cursor.execute("PRAGMA journal_mode=MEMORY")
+            cursor.execute("PRAGMA synchronous=OFF")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+            cursor.execute("BEGIN")
+
+            # 匯出為完整重建：先移除舊表，再依最新的結構重新建立
+            cursor.execute("DROP TABLE IF EXISTS tasks")
             cursor.execute("DROP TABLE IF EXISTS subjects")
-            cursor.execute("""
-                CREATE TABLE subjects (
-                    id TEXT PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    status TEXT,
-                    description TEXT
-                )
-            """)
+            create_schema(cursor)
+
+            # --- 處理 Subjects 表 ---
             subject_rows = [(s['id'], s['name'], s['status'], s['description']) for s in subjects]
             cursor.executemany("INSERT INTO subjects VALUES (?, ?, ?, ?)", subject_rows)
-            print(SUCCESS + f"  ✅ 成功寫入 {len(subject_rows)} 筆學科資料。")
+            _echo(SUCCESS + f"  ✅ 成功寫入 {len(subject_rows)} 筆學科資料。")
 
             # --- 處理 Tasks 表 ---
-            cursor.execute("DROP TABLE IF EXISTS tasks")
-            cursor.execute("""
-                CREATE TABLE tasks (
-                    task_id INTEGER PRIMARY KEY,
-                    subject_id TEXT,
-                    description TEXT NOT NULL,
-                    resource_code TEXT,
-                    status TEXT,
-                    type TEXT,
-                    due_date TEXT,
-                    peak_time_required INTEGER,
-                    last_review_date TEXT,
-                    next_review_date TEXT,
-                    review_interval INTEGER,
-                    FOREIGN KEY (subject_id) REFERENCES subjects (id)
-                )
-            """)
-            task_rows = [
-                (
-                    t['task_id'], t['subject_id'], t['description'], t.get('resource_code'),
-                    t['status'], t['type'], t.get('due_date'), 
-                    1 if t.get('peak_time_required') else 0,
-                    t.get('last_review_date'), t.get('next_review_date'),
-                    t.get('review_interval')
-                ) for t in tasks_data
-            ]
-            cursor.executemany("INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", task_rows)
-            print(SUCCESS + f"  ✅ 成功寫入 {len(task_rows)} 筆任務資料。")
+            task_count = 0
+            for batch in _batched(_task_rows(tasks_data), EXPORT_BATCH_SIZE):
+                cursor.executemany("INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+                task_count += len(batch)
+            _echo(SUCCESS + f"  ✅ 成功寫入 {task_count} 筆任務資料。")
             
             conn.commit()
 
     except sqlite3.Error as e:
-        print(ERROR + f"資料庫操作失敗：{e}")
+        _echo(ERROR + f"資料庫操作失敗：{e}")
         raise typer.Exit()
 
-    print(Style.BRIGHT + SUCCESS + f"\n資料庫匯出成功！檔案已儲存於 {DB_FILE}")
+    _echo(BOLD + SUCCESS + f"\n資料庫匯出成功！檔案已儲存於 {DB_FILE}")
 
 
-@app.command(name="show-id")
+@_command(app, "show-id")
 def show_subject_ids():
     """列出所有學科的名稱及其對應的代碼 (ID)。"""
     subjects_dict = get_subjects_dict()
     if not subjects_dict:
-        print(ERROR + "找不到任何學科資料，請檢查 subjects.json。")
+        _echo(ERROR + "找不到任何學科資料，請檢查 subjects.json。")
         raise typer.Exit()
     
-    print(HEADER + "--- 📖 學科代碼列表 ---")
-    print(Style.BRIGHT + f"{'學科名稱':<6s} | {'學科代碼 (ID)'}")
-    print(Style.BRIGHT + "-" * 25)
+    _echo(HEADER + "--- 📖 學科代碼列表 ---")
+    _echo(BOLD + f"{'學科名稱':<6s} | {'學科代碼 (ID)'}")
+    _echo(BOLD + "-" * 25)
     
     for subject in subjects_dict.values():
         name = subject.get('name', '未知學科')
         subject_id = subject.get('id', 'N/A')
-        print(f"{name:<7s}| " + INFO + f"{subject_id}")
+        _echo(f"{name:<7s}| " + INFO + f"{subject_id}")
 
-@app.command(name="status")
+@_command(app, "status")
 def show_status():
     """快速檢查目前的整體學習狀態，顯示各科目的待辦任務數量。"""
+    from collections import Counter
+    from operator import itemgetter
+
     tasks = load_data(TASKS_FILE)
     subjects_dict = get_subjects_dict()
 
     if not subjects_dict:
-        print(ERROR + "找不到任何學科資料，請先設定 subjects.json。")
+        _echo(ERROR + "找不到任何學科資料，請先設定 subjects.json。")
         raise typer.Exit()
 
     todo_counts = Counter(task['subject_id'] for task in tasks if task.get('status') == 'todo')
-    print(HEADER + "--- 📊 學習狀態總覽 (各科待辦任務) ---")
+    _echo(HEADER + "--- 📊 學習狀態總覽 (各科待辦任務) ---")
     
-    sorted_subjects = sorted(subjects_dict.values(), key=lambda s: todo_counts.get(s['id'], 0), reverse=True)
+    # 先取出每科的待辦數量再排序，迴圈內直接沿用，不必再次查找
+    keyed_subjects = [(todo_counts.get(subject_id, 0), subject) for subject_id, subject in subjects_dict.items()]
+    keyed_subjects.sort(key=itemgetter(0), reverse=True)
 
-    for subject in sorted_subjects:
-        subject_id, subject_name = subject.get('id'), subject.get('name', '未知科目')
-        count = todo_counts.get(subject_id, 0)
+    for count, subject in keyed_subjects:
+        subject_name = subject.get('name', '未知科目')
         
-        color = Fore.GREEN
-        if count > 5: color = Fore.RED
-        elif count > 2: color = Fore.YELLOW
+        color = GREEN
+        if count > 5: color = RED
+        elif count > 2: color = YELLOW
             
         bar = "█" * count
-        print(f"  - {subject_name:<6s}: " + Style.BRIGHT + color + f"{count:<2} 項 " + color + bar)
+        _echo(f"  - {subject_name:<6s}: " + BOLD + color + f"{count:<2} 項 " + color + bar)
         
     total_todo = sum(todo_counts.values())
-    print(DIM + "\n" + "-"*30)
-    print(f"總計待辦任務: " + Style.BRIGHT + WARNING + f"{total_todo} 項")
+    _echo(DIM + "\n" + "-"*30)
+    _echo(f"總計待辦任務: " + BOLD + WARNING + f"{total_todo} 項")
 
 
-@app.command(name="plan")
+@_command(app, "plan")
 def show_plan(daily: bool = typer.Option(False, "--daily", help="顯示每日學習計畫。")):
     """根據您的任務排程，產生今日的學習計畫。"""
+    from datetime import date
+    from planner import get_daily_plan
+
     if not daily:
-        print(WARNING + "請指定計畫類型，目前僅支援 --daily。")
+        _echo(WARNING + "請指定計畫類型，目前僅支援 --daily。")
         raise typer.Exit()
 
     tasks = load_data(TASKS_FILE)
-    subjects_dict = get_subjects_dict()
+    name_of = get_subject_names()
     daily_plan = get_daily_plan(tasks)
     review_tasks, new_tasks = daily_plan.get('review_tasks', []), daily_plan.get('new_tasks', [])
 
-    print(HEADER + f"--- 📝 您的今日學習計畫 ({datetime.now().strftime('%Y-%m-%d')}) ---")
+    today = date.today()
+    lines = [HEADER + f"--- 📝 您的今日學習計畫 ({today.isoformat()}) ---"]
 
-    print(SUB_HEADER + "\n🔥 高優先級複習 (逾期任務)")
+    lines.append(SUB_HEADER + "\n🔥 高優先級複習 (逾期任務)")
     overdue_tasks, due_today_tasks = [], []
     for task in review_tasks:
         try:
-            next_review_date = datetime.strptime(task['next_review_date'], '%Y-%m-%d').date()
-            overdue_days = (datetime.now().date() - next_review_date).days
-            if overdue_days > 0: overdue_tasks.append((task, overdue_days))
-            else: due_today_tasks.append(task)
+            next_review_date = date.fromisoformat(task['next_review_date'])
         except (ValueError, TypeError): continue
+        overdue_days = (today - next_review_date).days
+        if overdue_days > 0: overdue_tasks.append((task, overdue_days))
+        else: due_today_tasks.append(task)
     
-    if not overdue_tasks: print(SUCCESS + "  沒有逾期項目，做得很好！")
+    if not overdue_tasks: lines.append(SUCCESS + "  沒有逾期項目，做得很好！")
     else:
         for task, days in sorted(overdue_tasks, key=lambda x: x[1], reverse=True):
-            subject_name = subjects_dict.get(task.get('subject_id'), {}).get('name', '未知科目')
-            print(ERROR + f"  - [ID: {task['task_id']:<2}] ({subject_name}) {task['description']} - " + Style.BRIGHT + f"已逾期 {days} 天")
+            subject_name = name_of.get(task.get('subject_id'), '未知科目')
+            lines.append(ERROR + f"  - [ID: {task['task_id']:<2}] ({subject_name}) {task['description']} - " + BOLD + f"已逾期 {days} 天")
 
-    print(SUB_HEADER + "\n💧 今日到期複習")
-    if not due_today_tasks: print(SUCCESS + "  今日沒有到期的複習任務。")
+    lines.append(SUB_HEADER + "\n💧 今日到期複習")
+    if not due_today_tasks: lines.append(SUCCESS + "  今日沒有到期的複習任務。")
     else:
         for task in sorted(due_today_tasks, key=lambda x: x.get('task_id')):
-            subject_name = subjects_dict.get(task.get('subject_id'), {}).get('name', '未知科目')
-            print(Fore.BLUE + f"  - [ID: {task['task_id']:<2}] ({subject_name}) {task['description']}")
+            subject_name = name_of.get(task.get('subject_id'), '未知科目')
+            lines.append(BLUE + f"  - [ID: {task['task_id']:<2}] ({subject_name}) {task['description']}")
 
-    print(SUB_HEADER + "\n🚀 今日新任務")
-    if not new_tasks: print(SUCCESS + "  沒有新的任務，記得去 'task add' 新增！")
+    lines.append(SUB_HEADER + "\n🚀 今日新任務")
+    if not new_tasks: lines.append(SUCCESS + "  沒有新的任務，記得去 'task add' 新增！")
     else:
         for task in new_tasks:
-            subject_name = subjects_dict.get(task.get('subject_id'), {}).get('name', '未知科目')
-            print(Fore.GREEN + f"  - [ID: {task['task_id']:<2}] ({subject_name}) {task['description']}")
+            subject_name = name_of.get(task.get('subject_id'), '未知科目')
+            lines.append(GREEN + f"  - [ID: {task['task_id']:<2}] ({subject_name}) {task['description']}")
 
-    print(DIM + "\n" + "="*50)
-    print(INFO + "💡 提示：使用 'python main.py task complete <ID>' 來完成任務。")
+    lines.append(DIM + "\n" + "="*50)
+    lines.append(INFO + "💡 提示：使用 'python main.py task complete <ID>' 來完成任務。")
+    _print_lines(lines)
 
 
-@app.command(name="show-subjects")
+@_command(app, "show-subjects")
 def show_subjects_command():
     """顯示所有學科的盤點狀態。"""
     subjects_dict = get_subjects_dict()
     if not subjects_dict:
-        print(ERROR + "找不到任何學科資料，請檢查 subjects.json。")
+        _echo(ERROR + "找不到任何學科資料，請檢查 subjects.json。")
         return
 
-    print(HEADER + "--- 您的學科「紅黃綠」燈號盤點結果 ---\n")
+    _echo(HEADER + "--- 您的學科「紅黃綠」燈號盤點結果 ---\n")
     for subject in subjects_dict.values():
         name, status, desc = subject.get('name', '未知學科'), subject.get('status', 'unknown').lower(), subject.get('description', '沒有描述')
-        color_map = {'green': Fore.GREEN, 'yellow': Fore.YELLOW, 'red': Fore.RED}
+        color_map = {'green': GREEN, 'yellow': YELLOW, 'red': RED}
         symbol_map = {'green': '✅', 'yellow': '🟡', 'red': '🔴'}
-        color, symbol = color_map.get(status, Fore.WHITE), symbol_map.get(status, '⚪️')
-        print(color + f"{symbol} {name} ({status.capitalize()})")
-        print(DIM + f"   描述：{desc}\n")
+        color, symbol = color_map.get(status, WHITE), symbol_map.get(status, '⚪️')
+        _echo(color + f"{symbol} {name} ({status.capitalize()})")
+        _echo(DIM + f"   描述：{desc}\n")
 
-@task_app.command(name="list")
+@_command(task_app, "list")
 def list_tasks(status: str = typer.Option("all", "--status", "-s", help="依狀態篩選任務 (all, todo, doing, done)")):
     """列出所有任務。"""
     tasks = load_data(TASKS_FILE)
-    subjects_dict = get_subjects_dict()
+    name_of = get_subject_names()
     if not tasks:
-        print(WARNING + "目前沒有任何任務。")
+        _echo(WARNING + "目前沒有任何任務。")
         return
 
-    print(HEADER + f"--- 任務列表 (狀態: {status}) ---")
-    status_colors = {"todo": Fore.RED, "doing": Fore.YELLOW, "done": Fore.GREEN}
-    found_task = False
-    for task in tasks:
+    lines = [HEADER + f"--- 任務列表 (狀態: {status}) ---"]
+    status_colors = {"todo": RED, "doing": YELLOW, "done": GREEN}
+    wanted = status.lower()
+    filtered = tasks if wanted == 'all' else [t for t in tasks if t.get('status') == wanted]
+    for task in filtered:
         task_status = task.get('status', 'unknown')
-        if status.lower() != 'all' and task_status != status.lower(): continue
-        found_task = True
-        subject_name = subjects_dict.get(task.get('subject_id'), {}).get('name', '未知科目')
-        color = status_colors.get(task_status, Fore.WHITE)
+        subject_name = name_of.get(task.get('subject_id'), '未知科目')
+        color = status_colors.get(task_status, WHITE)
         
-        print(
+        lines.append(
             KEY + f"ID: {task['task_id']:<3} " +
             color + f"[{task_status.upper():^5}] " +
-            Fore.BLUE + f"({subject_name}) " +
-            Style.RESET_ALL + f"{task['description']}"
+            BLUE + f"({subject_name}) " +
+            RESET + f"{task['description']}"
         )
         next_review = task.get('next_review_date')
         date_info = INFO + f"  下次複習：{next_review}" if next_review else DIM + f"  截止日期：{task.get('due_date', '未設定')}"
-        print(date_info)
+        lines.append(date_info)
 
-    if not found_task:
-        print(WARNING + f"找不到狀態為 '{status}' 的任務。")
+    if not filtered:
+        lines.append(WARNING + f"找不到狀態為 '{status}' 的任務。")
+    _print_lines(lines)
 
-@task_app.command(name="add")
+@_command(task_app, "add")
 def add_task(
     description: str = typer.Argument(..., help="任務的詳細描述。"),
     subject_id: str = typer.Option(..., "--subject-id", "-id", help="此任務歸屬的學科ID。"),
@@ -314,56 +649,92 @@ def add_task(
     due_date: Optional[str] = typer.Option(None, "--due", "-d", help="任務截止日期 (格式: YYYY-MM-DD)。")
 ):
     """新增一筆新的學習任務。"""
-    tasks = load_data(TASKS_FILE)
-    new_id = max((task.get('task_id', 0) for task in tasks), default=0) + 1
-    new_task = {
-        "task_id": new_id, "subject_id": subject_id, "description": description, "resource_code": resource_code,
-        "status": "todo", "type": task_type.lower(), "due_date": due_date, "peak_time_required": False,
-        "last_review_date": None, "next_review_date": None, "review_interval": 0
-    }
-    tasks.append(new_task)
-    save_data(TASKS_FILE, tasks)
-    print(SUCCESS + f"✅ 成功新增任務 (ID: {new_id}): {description}")
+    global _max_task_id
+    # 共用列表已載入時 (可能含有尚未寫回的任務) 以其最大 ID 為準，否則才讀取 NEXT_ID_FILE
+    new_id = _max_task_id + 1 if _tasks_cache is not None else next_task_id()
+    new_task = build_task(new_id, description, subject_id, task_type, resource_code, due_date)
+    if append_record(TASKS_FILE, new_task):
+        if _tasks_cache is not None:
+            _tasks_cache.append(new_task)
+    else:
+        get_tasks().append(new_task)
+        mark_tasks_dirty()
+        flush_tasks()
+    _max_task_id = max(_max_task_id, new_id)
+    _save_next_task_id(new_id + 1)
+    _echo(SUCCESS + f"✅ 成功新增任務 (ID: {new_id}): {description}")
+
+@_command(task_app, "add-batch")
+def add_task_batch():
+    """
+    從標準輸入讀取 JSON 陣列，一次新增多筆任務。
 
-@task_app.command(name="complete")
+    陣列中每個物件需包含 description 與 subject_id，並可選填 task_type、resource_code、due_date。
+    所有任務在記憶體中建立後只寫入 tasks.json 一次；任一筆格式錯誤時不會寫入任何任務。
+    """
+    import json
+    try:
+        items = json.loads(sys.stdin.read())
+    except json.JSONDecodeError as e:
+        _echo(ERROR + f"錯誤：標準輸入的 JSON 格式不正確：{e}")
+        raise typer.Exit(code=1)
+    if not isinstance(items, list):
+        _echo(ERROR + "錯誤：標準輸入必須是任務物件的 JSON 陣列。")
+        raise typer.Exit(code=1)
+    for index, item in enumerate(items, 1):
+        if not isinstance(item, dict):
+            _echo(ERROR + f"錯誤：第 {index} 筆任務必須是 JSON 物件。")
+            raise typer.Exit(code=1)
+        for field in ("description", "subject_id"):
+            if not isinstance(item.get(field), str) or not item[field]:
+                _echo(ERROR + f"錯誤：第 {index} 筆任務的 {field} 必須是非空字串。")
+                raise typer.Exit(code=1)
+        for field in ("task_type", "resource_code", "due_date"):
+            if field in item and not isinstance(item[field], str):
+                _echo(ERROR + f"錯誤：第 {index} 筆任務的 {field} 必須是字串或省略。")
+                raise typer.Exit(code=1)
+    if not items:
+        _echo(WARNING + "沒有要新增的任務。")
+        return
+
+    new_tasks = [
+        create_task(item['description'], item['subject_id'], task_type=item.get('task_type', "study"),
+                    resource_code=item.get('resource_code'), due_date=item.get('due_date'))
+        for item in items
+    ]
+    flush_tasks()
+    _save_next_task_id(_max_task_id + 1)
+    _echo(SUCCESS + f"✅ 成功新增 {len(new_tasks)} 筆任務 (ID: {new_tasks[0]['task_id']}–{new_tasks[-1]['task_id']})")
+
+@_command(task_app, "complete")
 def complete_task(task_id: int = typer.Argument(..., help="要完成或複習的任務 ID。")):
     """完成一項任務或紀錄一次複習，並根據表現更新排程與寫入日誌。"""
-    tasks = load_data(TASKS_FILE)
+    tasks = get_tasks()
     task_to_update = next((task for task in tasks if task.get('task_id') == task_id), None)
     if not task_to_update:
-        print(ERROR + f"錯誤：找不到 ID 為 {task_id} 的任務。")
+        _echo(ERROR + f"錯誤：找不到 ID 為 {task_id} 的任務。")
         raise typer.Exit()
 
-    print(HEADER + f"--- 正在完成任務 ID: {task_id} ({task_to_update['description']}) ---")
-    performance = typer.prompt("你的複習/學習表現如何？ (good, ok, bad)").lower()
-    while performance not in ['good', 'ok', 'bad']:
-        print(WARNING + "無效的輸入，請重新輸入。")
-        performance = typer.prompt("表現評分 (good, ok, bad)").lower()
-    
+    _echo(HEADER + f"--- 正在完成任務 ID: {task_id} ({task_to_update['description']}) ---")
+    # 由 prompt 內建的驗證迴圈處理無效輸入：_parse_performance 拋出錯誤時會自動重新詢問
+    performance = typer.prompt("你的複習/學習表現如何？ (good, ok, bad)", value_proc=_parse_performance)
+
     duration_minutes = typer.prompt("總共花了多少分鐘？", type=int)
     notes = typer.prompt("有什麼心得筆記嗎？ (可留空)", default="", show_default=False)
 
-    activity_type = "review" if task_to_update.get('review_interval', 0) > 0 else "new_study"
-    if activity_type == "new_study": task_to_update['status'] = 'done'
-
-    log_data = load_data(LOG_FILE)
-    if not isinstance(log_data, dict) or 'logs' not in log_data: log_data = {"logs": []}
-    logs = log_data.get("logs", [])
-    new_log_id = max((log.get('log_id', 0) for log in logs), default=0) + 1
-    new_log = {
-        "log_id": new_log_id, "task_id": task_id, "timestamp": datetime.now(timezone.utc).isoformat(),
-        "activity_type": activity_type, "duration_minutes": duration_minutes, "performance": performance, "notes": notes
-    }
-    logs.append(new_log)
-    save_data(LOG_FILE, {"logs": logs})
-    print(SUCCESS + "學習活動已成功寫入日誌。")
+    new_log = apply_completion(task_to_update, next_log_id(), performance, duration_minutes, notes)
+    if not append_record(LOG_FILE, new_log, key="logs"):
+        log_data = load_data(LOG_FILE)
+        if not isinstance(log_data, dict) or 'logs' not in log_data: log_data = {"logs": []}
+        save_data(LOG_FILE, {"logs": [*log_data.get("logs", []), new_log]})
+    _echo(SUCCESS + "學習活動已成功寫入日誌。")
 
-    updated_task = update_review_schedule(task_to_update, performance)
-    save_data(TASKS_FILE, tasks)
-    next_review_date = updated_task.get('next_review_date', 'N/A')
+    mark_tasks_dirty()
+    flush_tasks()
+    next_review_date = task_to_update.get('next_review_date', 'N/A')
     
-    print(Style.BRIGHT + SUCCESS + f"✅ 任務 {task_id} 已完成！")
-    print(INFO + f"   下次複習日期已更新為：{next_review_date}")
+    _echo(BOLD + SUCCESS + f"✅ 任務 {task_id} 已完成！")
+    _echo(INFO + f"   下次複習日期已更新為：{next_review_date}")
 
 if __name__ == '__main__':
     app()
\ No newline at end of file
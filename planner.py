@@ -1,8 +1,22 @@
 # planner.py
 
-from datetime import datetime
+import re
+from datetime import date
 from typing import List, Dict, Any
 
+# 補零的 YYYY-MM-DD；只有這種格式的字典序才與日期先後一致
+_ISO_DATE = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}')
+
+def _is_iso_date(value: Any) -> bool:
+    """檢查是否為補零且實際存在的 YYYY-MM-DD 日期字串。"""
+    if not isinstance(value, str) or not _ISO_DATE.fullmatch(value):
+        return False
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
 def get_daily_plan(tasks: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
     """
     從所有任務中掃描並產生今日的學習計畫。
@@ -18,40 +32,25 @@ def get_daily_plan(tasks: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]
         一個字典，包含 'review_tasks' 和 'new_tasks' 兩個鍵，
         其值分別為對應的任務列表。
     """
-    today = datetime.now().date()
+    # ISO 日期字串 (YYYY-MM-DD，補零) 的字典序與日期先後一致，因此可直接以字串比較
+    today_iso = date.today().isoformat()
     
     review_tasks = []
     new_tasks = []
 
     for task in tasks:
-        is_review_task = False
-        
-        # --- 判斷是否為需要複習的任務 ---
-        next_review_date_str = task.get('next_review_date')
-        if next_review_date_str:
-            try:
-                # 將字串轉換為日期物件以進行比較
-                next_review_date = datetime.strptime(next_review_date_str, '%Y-%m-%d').date()
-                if next_review_date <= today:
-                    review_tasks.append(task)
-                    is_review_task = True
-            except (ValueError, TypeError):
-                # 若日期格式不正確或為 None，則忽略
-                continue
-        
-        # 如果任務已經被歸類為複習任務，則不應再被視為新任務
-        if is_review_task:
+        next_review_date = task.get('next_review_date')
+        if next_review_date and not _is_iso_date(next_review_date):
+            # 若日期格式不正確或型別錯誤，則不論日期先後一律忽略
             continue
 
-        # --- 判斷是否為尚未開始的新任務 ---
-        # 條件：狀態為 'todo' 且從未被複習過 (即複習間隔為 0)
-        is_brand_new_task = (
-            task.get('status') == 'todo' and
-            task.get('review_interval') == 0
-        )
-        if is_brand_new_task:
+        if next_review_date and next_review_date <= today_iso:
+            # 今天到期或已逾期的複習任務
+            review_tasks.append(task)
+        elif task.get('status') == 'todo' and task.get('review_interval') == 0:
+            # 尚未開始的新任務：狀態為 'todo' 且從未被複習過 (即複習間隔為 0)
             new_tasks.append(task)
-            
+
     return {
         "review_tasks": review_tasks,
         "new_tasks": new_tasks
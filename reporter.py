@@ -1,8 +1,10 @@
 # reporter.py
 
-from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional
 from collections import defaultdict
+from functools import cache, lru_cache
 import json
 from pathlib import Path
 
@@ -12,18 +14,58 @@ LOG_FILE = CWD / "log.json"
 TASKS_FILE = CWD / "tasks.json"
 SUBJECTS_FILE = CWD / "subjects.json"
 
-def _load_json_data(filepath: Path) -> List[Dict[str, Any]]:
-    """一個輔助函式，用於載入 JSON 檔案中的列表資料。"""
+# --- 長條圖 ---
+MAX_BAR_WIDTH = 40  # 長條圖最大寬度
+_BAR = "█" * MAX_BAR_WIDTH  # 預先建立最長的長條，各列以切片取得所需長度
+
+# 補零的 YYYY-MM-DD；只有這種格式的字典序才與日期先後一致
+_ISO_DATE = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}')
+
+def _is_iso_date(value: str) -> bool:
+    """檢查字串是否為補零且實際存在的 YYYY-MM-DD 日期。"""
+    if not _ISO_DATE.fullmatch(value):
+        return False
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+@cache
+def _orjson():
+    """延遲載入選用的 orjson 模組 (與 main._orjson 相同)；未安裝時回傳 None，退回標準函式庫的 json。"""
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+def _load_json_data(filepath: Path, key: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    一個輔助函式，用於載入 JSON 檔案中的列表資料。
+
+    若檔案的頂層為物件 (例如 {"logs": [...]} 或 {"subjects": [...]})，
+    由呼叫端以 key 指定要取出的列表；頂層本身就是列表時 key 留空即可。
+    解析結果以檔案的修改時間為鍵快取，同一行程內重複產生報告時不必重新解析。
+    """
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            if isinstance(data, dict):
-                # 處理可能的 JSON 結構: {"logs": [...]} 或 {"subjects": [...]}
-                key = next(iter(data))
-                return data.get(key, [])
-            return data
-    except (FileNotFoundError, IndexError, json.JSONDecodeError, StopIteration):
+        mtime_ns = filepath.stat().st_mtime_ns
+    except FileNotFoundError:
         return []
+    return _load_json_cached(str(filepath), key, mtime_ns)
+
+@lru_cache(maxsize=8)
+def _load_json_cached(path: str, key: Optional[str], mtime_ns: int) -> List[Dict[str, Any]]:
+    """_load_json_data 的快取層；同一檔案內容不變時直接沿用上次的解析結果。"""
+    try:
+        raw = Path(path).read_bytes()
+        orjson = _orjson()
+        data = orjson.loads(raw) if orjson else json.loads(raw)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+    if key is not None and isinstance(data, dict):
+        return data.get(key, [])
+    return data
 
 def generate_weekly_report_ascii() -> str:
     """
@@ -33,9 +75,9 @@ def generate_weekly_report_ascii() -> str:
     Returns:
         一個格式化後可用於終端機輸出的字串。
     """
-    logs = _load_json_data(LOG_FILE)
+    logs = _load_json_data(LOG_FILE, "logs")
     tasks = _load_json_data(TASKS_FILE)
-    subjects = _load_json_data(SUBJECTS_FILE)
+    subjects = _load_json_data(SUBJECTS_FILE, "subjects")
 
     if not logs or not tasks or not subjects:
         return "尚無足夠的資料可產生報告。"
@@ -51,21 +93,34 @@ def generate_weekly_report_ascii() -> str:
     time_distribution = defaultdict(float)
     bad_counts = defaultdict(int)
 
+    # ISO 時間戳記的前 10 個字元即為日期 (YYYY-MM-DD)，可直接與本週起始日做字串比較；
+    # 報告只需要日期，因此不必以 fromisoformat 完整解析每一筆紀錄，
+    # 只對通過比較的紀錄檢查日期格式，排除 "unknown" 這類排序恰好在後面的錯誤值。
+    start_iso = start_of_week.isoformat()
+
+    # 迴圈內會反覆呼叫的查找方法先綁定為區域變數
+    subject_of = task_to_subject_map.get
+
     for log in logs:
-        try:
-            log_timestamp = datetime.fromisoformat(log['timestamp'].replace('Z', '+00:00'))
-            log_date = log_timestamp.date()
-
-            if log_date >= start_of_week:
-                task_id = log.get('task_id')
-                subject_id = task_to_subject_map.get(task_id)
-                if subject_id:
-                    time_distribution[subject_id] += float(log.get('duration_minutes', 0))
-                    if log.get('performance') == 'bad':
-                        bad_counts[subject_id] += 1
-        except (ValueError, TypeError, KeyError):
+        timestamp = log.get('timestamp')
+        if not isinstance(timestamp, str) or timestamp[:10] < start_iso or not _is_iso_date(timestamp[:10]):
+            continue
+        subject_id = subject_of(log.get('task_id'))
+        if not subject_id:
             continue
 
+        # 日誌中的時長通常已是數字，只有在不是時才嘗試轉換
+        duration = log.get('duration_minutes', 0)
+        if not isinstance(duration, (int, float)):
+            try:
+                duration = float(duration)
+            except (ValueError, TypeError):
+                continue
+
+        time_distribution[subject_id] += duration
+        if log.get('performance') == 'bad':
+            bad_counts[subject_id] += 1
+
     if not time_distribution:
         return "本週尚無學習紀錄。"
 
@@ -79,7 +134,6 @@ def generate_weekly_report_ascii() -> str:
     report_lines.append(f"--- 📊 本週學習時間分佈報告 (自 {start_of_week.strftime('%Y-%m-%d')} 起) ---")
     
     max_minutes = max(time_distribution.values()) if time_distribution else 1
-    max_bar_width = 40  # 長條圖最大寬度
 
     # 根據學習時間排序
     sorted_subjects = sorted(time_distribution.items(), key=lambda item: item[1], reverse=True)
@@ -88,8 +142,8 @@ def generate_weekly_report_ascii() -> str:
         subject_name = subject_id_to_name_map.get(subject_id, subject_id)
         hours = total_minutes / 60.0
         
-        bar_width = int((total_minutes / max_minutes) * max_bar_width)
-        bar = "█" * bar_width
+        # 時長可能為負數 (CLI 接受任意整數)，寬度需夾在 0 以上，避免負數切片從尾端截取
+        bar = _BAR[:max(0, int((total_minutes / max_minutes) * MAX_BAR_WIDTH))]
 
         marker = "🔥" if subject_id == weakest_subject_id else ""
         
@@ -1,6 +1,6 @@
 # scheduler.py
 
-from datetime import datetime, timedelta
+from datetime import date
 from typing import Dict, Any
 
 # 定義萊特納系統的複習間隔（天）。每個數字代表一個「盒子」。
@@ -9,6 +9,12 @@ from typing import Dict, Any
 # ...以此類推
 LEITNER_INTERVALS = [1, 3, 7, 14, 30]
 
+# 每個盒子的間隔對應到「下一個」盒子的間隔；最後一個盒子維持在最長的間隔。
+_NEXT_INTERVAL = {
+    interval: LEITNER_INTERVALS[min(i + 1, len(LEITNER_INTERVALS) - 1)]
+    for i, interval in enumerate(LEITNER_INTERVALS)
+}
+
 def update_review_schedule(task: Dict[str, Any], performance: str) -> Dict[str, Any]:
     """
     根據表現使用萊特納系統更新任務的複習排程。
@@ -23,7 +29,7 @@ def update_review_schedule(task: Dict[str, Any], performance: str) -> Dict[str,
     Returns:
         更新後的任務字典。
     """
-    today = datetime.now().date()
+    today = date.today()
     task['last_review_date'] = today.isoformat()
 
     current_interval = task.get('review_interval', 0)
@@ -31,23 +37,9 @@ def update_review_schedule(task: Dict[str, Any], performance: str) -> Dict[str,
     new_interval = current_interval
 
     if performance in ['good', 'ok']:
-        # 表現良好或尚可 -> 移至下一個盒子
-        if current_interval == 0:
-            # 如果是第一次複習，移至第一個盒子
-            new_interval = LEITNER_INTERVALS[0]
-        else:
-            try:
-                # 找到目前間隔在序列中的位置，並推進到下一個
-                current_index = LEITNER_INTERVALS.index(current_interval)
-                next_index = current_index + 1
-                if next_index < len(LEITNER_INTERVALS):
-                    new_interval = LEITNER_INTERVALS[next_index]
-                else:
-                    # 已完成所有預設的盒子，維持在最長的間隔
-                    new_interval = LEITNER_INTERVALS[-1]
-            except ValueError:
-                # 如果當前的間隔不在預設序列中，將其重設回第一個盒子
-                new_interval = LEITNER_INTERVALS[0]
+        # 表現良好或尚可 -> 移至下一個盒子。
+        # 第一次複習 (間隔 0) 或間隔不在預設序列中時，都移至第一個盒子。
+        new_interval = _NEXT_INTERVAL.get(current_interval, LEITNER_INTERVALS[0])
 
     elif performance == 'bad':
         # 表現不佳 -> 無論如何都重設回第一個盒子
@@ -56,7 +48,8 @@ def update_review_schedule(task: Dict[str, Any], performance: str) -> Dict[str,
     # 更新任務的間隔和下一次複習日期
     task['review_interval'] = new_interval
     if new_interval > 0:
-        next_review_date = today + timedelta(days=new_interval)
+        # 以序數日直接相加，省去建立 timedelta 物件
+        next_review_date = date.fromordinal(today.toordinal() + new_interval)
         task['next_review_date'] = next_review_date.isoformat()
     else:
         # 如果間隔為 0，表示沒有排定的複習
@@ -10,8 +10,12 @@ from pathlib import Path
 from datetime import datetime, date, timedelta
 from colorama import Fore, Style, init
 
-# 初始化 colorama
-init(autoreset=True)
+import main as main_cli
+
+# 只有輸出到終端機時才套用顏色；導向檔案或管線時省去 ANSI 碼與 colorama 的包裝
+_USE_COLOR = sys.stdout.isatty()
+if _USE_COLOR:
+    init(autoreset=True)
 
 # --- 常數定義 ---
 CWD = Path(__file__).parent
@@ -20,26 +24,31 @@ TASKS_FILE = CWD / "tasks.json"
 LOG_FILE = CWD / "log.json"
 SUBJECTS_FILE = CWD / "subjects.json"
 
+# 子行程的直譯器、主程式路徑與環境變數在整個測試中都不變，只在匯入時建立一次；
+# 若目前環境已啟用 UTF-8 模式則傳入 None，直接沿用父行程的環境
+_PY = sys.executable
+_SCRIPT = str(MAIN_SCRIPT)
+_ENV = None if os.environ.get("PYTHONUTF8") == "1" else {**os.environ, "PYTHONUTF8": "1"}
+
 # --- 樣式常數 ---
-HEADER = Style.BRIGHT + Fore.MAGENTA
-SUCCESS = Style.BRIGHT + Fore.GREEN
-ERROR = Style.BRIGHT + Fore.RED
-WARNING = Style.BRIGHT + Fore.YELLOW
-INFO = Style.BRIGHT + Fore.CYAN
-DIM = Style.DIM
+HEADER = Style.BRIGHT + Fore.MAGENTA if _USE_COLOR else ""
+SUCCESS = Style.BRIGHT + Fore.GREEN if _USE_COLOR else ""
+ERROR = Style.BRIGHT + Fore.RED if _USE_COLOR else ""
+WARNING = Style.BRIGHT + Fore.YELLOW if _USE_COLOR else ""
+INFO = Style.BRIGHT + Fore.CYAN if _USE_COLOR else ""
+DIM = Style.DIM if _USE_COLOR else ""
 
 def run_command(command: list, input_text: str = None) -> subprocess.CompletedProcess:
     """執行一個 CLI 命令，並設定好處理中文編碼的環境。"""
     try:
-        child_env = {**os.environ, "PYTHONUTF8": "1"}
         result = subprocess.run(
-            [sys.executable, str(MAIN_SCRIPT)] + command,
+            [_PY, _SCRIPT, *command],
             input=input_text,
             capture_output=True,
             text=True,
             encoding='utf-8',
             errors='ignore',
-            env=child_env
+            env=_ENV
         )
         if result.returncode != 0:
             # 如果 main.py 真的出錯，就印出錯誤訊息
@@ -76,10 +85,15 @@ def get_valid_subject_ids() -> list:
 
 def main(
     tasks_to_add: int = typer.Option(50, help="要快速新增的任務數量。"),
-    tasks_to_complete: int = typer.Option(30, help="要從新增的任務中隨機完成的數量。")
+    tasks_to_complete: int = typer.Option(30, help="要從新增的任務中隨機完成的數量。"),
+    via_cli: bool = typer.Option(False, "--cli", help="改以單一 `task add-batch` 子行程新增所有任務。")
 ):
     """
     對學習系統執行壓力測試：大量新增、完成任務，並驗證結果。
+
+    新增與完成任務直接在行程內呼叫 main 的核心函式；
+    最後的 `status` 與 `plan --daily` 仍以子行程實際執行 CLI 作為煙霧測試。
+    加上 --cli 時，新增任務改為把整批任務以 JSON 傳給一次 `task add-batch` 呼叫。
     """
     if tasks_to_complete > tasks_to_add:
         print(ERROR + "要完成的任務數量不能大於新增的數量。")
@@ -89,23 +103,47 @@ def main(
     valid_ids = get_valid_subject_ids()
     
     # --- 階段一：大量新增任務 ---
+    # 直接在同一個行程內呼叫 main 的核心函式操作記憶體中的列表，最後只寫入一次檔案，
+    # 省去每筆任務都要啟動一次直譯器並重新讀寫 tasks.json 的成本。
     print(HEADER + f"\n--- 階段一：壓力測試 - 新增 {tasks_to_add} 個任務 ---")
-    add_success_count = 0
-    for i in range(1, tasks_to_add + 1):
-        subject_id = random.choice(valid_ids)
-        desc = f"壓力測試任務_{i:03d}"
-        print(f"  - 新增任務 {i}/{tasks_to_add} (科目: {subject_id})... ", end="")
-        result = run_command(["task", "add", desc, "--subject-id", subject_id])
-        if result.returncode == 0 and "成功新增任務" in result.stdout:
-            add_success_count += 1
+    if via_cli:
+        # 整批任務只啟動一次子行程，tasks.json 也只寫入一次
+        payload = json.dumps(
+            [{"description": f"壓力測試任務_{i:03d}", "subject_id": random.choice(valid_ids)}
+             for i in range(1, tasks_to_add + 1)],
+            ensure_ascii=False
+        )
+        print(f"  - 以 `task add-batch` 一次送出 {tasks_to_add} 個任務... ", end="")
+        result = run_command(["task", "add-batch"], input_text=payload)
+        tasks = main_cli.get_tasks()
+        if result.returncode == 0 and [t['task_id'] for t in tasks] == list(range(1, tasks_to_add + 1)):
+            add_success_count = tasks_to_add
             print(SUCCESS + "成功")
         else:
+            add_success_count = 0
             print(ERROR + "失敗")
+    else:
+        tasks = main_cli.get_tasks()
+        add_success_count = 0
+        for i in range(1, tasks_to_add + 1):
+            subject_id = random.choice(valid_ids)
+            desc = f"壓力測試任務_{i:03d}"
+            print(f"  - 新增任務 {i}/{tasks_to_add} (科目: {subject_id})... ", end="")
+            new_task = main_cli.create_task(desc, subject_id)
+            if new_task['task_id'] == i and len(tasks) == i:
+                add_success_count += 1
+                print(SUCCESS + "成功")
+            else:
+                print(ERROR + "失敗")
+    main_cli.flush_tasks()
     print(SUCCESS + f"  ✅ 完成！成功新增 {add_success_count}/{tasks_to_add} 個任務。")
 
     # --- 階段二：大量完成任務 ---
     print(HEADER + f"\n--- 階段二：壓力測試 - 完成 {tasks_to_complete} 個任務 ---")
     task_ids_to_complete = random.sample(range(1, tasks_to_add + 1), tasks_to_complete)
+    # 以 ID 查找任務；新增階段失敗時找不到的任務會記為完成失敗，而不是中斷測試
+    tasks_by_id = {t['task_id']: t for t in tasks}
+    logs = []
     complete_success_count = 0
     performances = ["good", "ok", "bad"]
     for i, task_id in enumerate(task_ids_to_complete, 1):
@@ -113,39 +151,33 @@ def main(
         duration = random.randint(10, 90)
         notes = f"自動化測試筆記 for task {task_id}."
         print(f"  - 完成任務 {i}/{tasks_to_complete} (ID: {task_id}, 表現: {performance})... ", end="")
-        
-        user_input = f"{performance}\n{duration}\n{notes}\n"
-        
-        # 【修正點】: 改變驗證邏輯
-        # 1. 執行命令前，先記錄目前的日誌數量
-        try:
-            log_before = len(json.loads(LOG_FILE.read_text(encoding='utf-8'))['logs'])
-        except (FileNotFoundError, json.JSONDecodeError):
-            log_before = 0
-            
-        # 2. 執行命令
-        result = run_command(["task", "complete", str(task_id)], input_text=user_input)
-
-        # 3. 執行命令後，再次檢查日誌數量
-        try:
-            log_after = len(json.loads(LOG_FILE.read_text(encoding='utf-8'))['logs'])
-        except (FileNotFoundError, json.JSONDecodeError):
-            log_after = log_before
-
-        # 4. 如果命令成功執行且日誌數量增加，才算成功
-        if result.returncode == 0 and log_after == log_before + 1:
+
+        task = tasks_by_id.get(task_id)
+        if task is None:
+            print(ERROR + "失敗 (找不到任務)")
+            continue
+        schedule_before = (task.get('next_review_date'), task.get('review_interval'))
+        new_log = main_cli.apply_completion(task, len(logs) + 1, performance, duration, notes)
+        logs.append(new_log)
+
+        # 日誌必須對應到這個任務，且任務的複習排程確實被更新才算成功
+        if (new_log.get('task_id') == task_id and task.get('status') == 'done' and
+                (task.get('next_review_date'), task.get('review_interval')) != schedule_before):
             complete_success_count += 1
             print(SUCCESS + "成功")
         else:
             print(ERROR + "失敗")
+    main_cli.save_data(LOG_FILE, {"logs": logs})
+    main_cli.mark_tasks_dirty()
+    main_cli.flush_tasks()
 
     print(SUCCESS + f"  ✅ 完成！成功回報 {complete_success_count}/{tasks_to_complete} 個任務。")
 
     # --- 階段三：生成報告與驗證 ---
     print(HEADER + "\n--- 階段三：驗證與報告 ---")
-    # ... (後續報告部分不變) ...
-    final_tasks = json.loads(TASKS_FILE.read_text(encoding='utf-8'))
-    final_logs = json.loads(LOG_FILE.read_text(encoding='utf-8'))
+    # 透過 main 的 load_data 重新從磁碟讀取 (有安裝 orjson 時以其解析)，確認實際寫入的內容
+    final_tasks = main_cli.load_data(TASKS_FILE)
+    final_logs = main_cli.load_data(LOG_FILE)
     
     print(INFO + "1. 驗證 JSON 檔案完整性...")
     tasks_ok = len(final_tasks) == tasks_to_add
@@ -158,8 +190,9 @@ def main(
     if not task_ids_to_complete:
         print(WARNING + "  - 沒有完成任何任務，跳過排程驗證。")
     else:
+        tasks_by_id = {t['task_id']: t for t in final_tasks}
         for task_id in task_ids_to_complete[:3]:
-            task = next((t for t in final_tasks if t['task_id'] == task_id), None)
+            task = tasks_by_id.get(task_id)
             if task and not (task['status'] == 'done' and \
                     task['last_review_date'] == str(date.today()) and \
                     datetime.strptime(task['next_review_date'], '%Y-%m-%d').date() > date.today() and \
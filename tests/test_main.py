@@ -0,0 +1,252 @@
+# tests/test_main.py
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# 將專案根目錄添加到 Python 路徑中，以便 pytest 可以找到 main 模組
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import main
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """
+    將 main 的資料檔案路徑指向暫存目錄，並重設行程內共用的任務列表。
+    monkeypatch 會在測試結束後還原，atexit 的 flush_tasks 不會寫到真正的資料檔。
+    """
+    monkeypatch.setattr(main, "TASKS_FILE", tmp_path / "tasks.json")
+    monkeypatch.setattr(main, "LOG_FILE", tmp_path / "log.json")
+    monkeypatch.setattr(main, "SUBJECTS_FILE", tmp_path / "subjects.json")
+    monkeypatch.setattr(main, "NEXT_ID_FILE", tmp_path / "tasks.json.nextid")
+    monkeypatch.setattr(main, "_tasks_cache", None)
+    monkeypatch.setattr(main, "_tasks_dirty", False)
+    monkeypatch.setattr(main, "_max_task_id", 0)
+    main._load_data_cached.cache_clear()
+    yield tmp_path
+    main._load_data_cached.cache_clear()
+
+
+def test_get_tasks_does_not_leak_into_load_data_cache(data_dir):
+    """
+    測試修改共用的任務列表後，load_data 仍回傳磁碟上的內容。
+    """
+    main.save_data(main.TASKS_FILE, [main.build_task(1, "既有任務", "math")])
+    assert len(main.load_data(main.TASKS_FILE)) == 1
+
+    main.create_task("尚未寫回的任務", "math")
+
+    assert len(main.get_tasks()) == 2
+    assert len(main.load_data(main.TASKS_FILE)) == 1
+
+
+def test_add_task_after_create_task_uses_next_free_id(data_dir):
+    """
+    測試同一行程內先以 create_task 新增 (尚未寫回)、再呼叫 add_task 時不會產生重複的 ID。
+    """
+    main.save_data(main.TASKS_FILE, [main.build_task(1, "既有任務", "math")])
+
+    in_memory = main.create_task("記憶體中的任務", "math")
+    main.add_task("命令新增的任務", subject_id="math", task_type="study", resource_code=None, due_date=None)
+    main.flush_tasks()
+
+    task_ids = [task['task_id'] for task in main._read_data(main.TASKS_FILE)]
+    assert in_memory['task_id'] == 2
+    assert sorted(task_ids) == [1, 2, 3]
+
+
+def _sample_log(log_id: int) -> dict:
+    return {"log_id": log_id, "task_id": 1, "performance": "good", "duration_minutes": 30, "notes": "筆記"}
+
+
+def test_append_record_to_empty_array_matches_save_data(data_dir):
+    """
+    測試附加到空陣列 `[]` 的結果與 save_data 完整寫入的內容逐位元組相同。
+    """
+    main.TASKS_FILE.write_bytes(b"[]")
+    task = main.build_task(1, "第一個任務", "math")
+
+    assert main.append_record(main.TASKS_FILE, task) is True
+
+    expected = data_dir / "expected.json"
+    main.save_data(expected, [task])
+    assert main.TASKS_FILE.read_bytes() == expected.read_bytes()
+
+
+def test_append_record_to_compact_keyed_object(data_dir):
+    """
+    測試附加到未縮排的 `{"logs": []}` 時，結果仍是合法且內容正確的 JSON。
+    """
+    main.LOG_FILE.write_bytes(b'{"logs": []}')
+
+    assert main.append_record(main.LOG_FILE, _sample_log(1), key="logs") is True
+    assert main._read_data(main.LOG_FILE) == {"logs": [_sample_log(1)]}
+
+
+def test_append_record_to_non_empty_files_matches_save_data(data_dir):
+    """
+    測試附加到非空的任務陣列與日誌物件時，結果與 save_data 完整寫入逐位元組相同。
+    """
+    tasks = [main.build_task(1, "第一個任務", "math"), main.build_task(2, "第二個任務", "eng")]
+    main.save_data(main.TASKS_FILE, tasks[:1])
+    main.save_data(main.LOG_FILE, {"logs": [_sample_log(1)]})
+
+    assert main.append_record(main.TASKS_FILE, tasks[1]) is True
+    assert main.append_record(main.LOG_FILE, _sample_log(2), key="logs") is True
+
+    expected = data_dir / "expected.json"
+    main.save_data(expected, tasks)
+    assert main.TASKS_FILE.read_bytes() == expected.read_bytes()
+    main.save_data(expected, {"logs": [_sample_log(1), _sample_log(2)]})
+    assert main.LOG_FILE.read_bytes() == expected.read_bytes()
+
+
+def test_append_record_rejects_wrong_shape_and_missing_file(data_dir):
+    """
+    測試頂層結構不符或檔案不存在時回傳 False，且不修改檔案。
+    """
+    main.TASKS_FILE.write_bytes(b'{"logs": []}')
+    main.LOG_FILE.write_bytes(b"[]")
+
+    assert main.append_record(main.TASKS_FILE, main.build_task(1, "任務", "math")) is False
+    assert main.append_record(main.LOG_FILE, _sample_log(1), key="logs") is False
+    assert main.TASKS_FILE.read_bytes() == b'{"logs": []}'
+    assert main.LOG_FILE.read_bytes() == b"[]"
+
+    missing = data_dir / "missing.json"
+    assert main.append_record(missing, _sample_log(1), key="logs") is False
+    assert not missing.exists()
+
+
+def test_next_log_id_reads_tail_and_falls_back_to_full_load(data_dir, monkeypatch):
+    """
+    測試 next_log_id 從檔案尾端取得最後的 log_id；尾端找不到時改為載入整個日誌。
+    """
+    assert main.next_log_id() == 1
+
+    main.save_data(main.LOG_FILE, {"logs": [_sample_log(3), _sample_log(7)]})
+    assert main.next_log_id() == 8
+
+    # 讀取範圍縮小到只剩結尾的括號，尾端必定找不到 log_id
+    monkeypatch.setattr(main, "APPEND_TAIL_BYTES", 8)
+    assert main.next_log_id() == 8
+
+
+def test_next_task_id_uses_sidecar_until_tasks_file_changes(data_dir):
+    """
+    測試 add_task 之後 next_task_id 直接採用 NEXT_ID_FILE；
+    tasks.json 被其他方式改寫後，改為重新掃描全部任務。
+    """
+    main.save_data(main.TASKS_FILE, [main.build_task(1, "既有任務", "math")])
+    main.add_task("新任務", subject_id="math", task_type="study", resource_code=None, due_date=None)
+
+    assert main.NEXT_ID_FILE.exists()
+    assert main.next_task_id() == 3
+
+    # 外部改寫 tasks.json，NEXT_ID_FILE 記錄的大小與修改時間不再相符
+    main.save_data(main.TASKS_FILE, [main.build_task(i, f"任務 {i}", "math") for i in (1, 2, 10)])
+    assert main.next_task_id() == 11
+
+
+def _register_task_commands(monkeypatch, argv):
+    """以指定的參數列重新判斷要註冊的命令，回傳一個全新 task_app 上實際註冊的命令名稱。"""
+    import typer
+
+    monkeypatch.setattr(main, "task_app", typer.Typer())
+    invoked = main._sniff_subcommand(argv, main.APP_COMMANDS)
+    invoked_task = main._sniff_subcommand(argv[argv.index("task") + 1:], main.TASK_COMMANDS) if invoked == "task" else None
+    monkeypatch.setattr(main, "_INVOKED", invoked)
+    monkeypatch.setattr(main, "_INVOKED_TASK", invoked_task)
+    for name in main.TASK_COMMANDS:
+        main._command(main.task_app, name)(lambda: None)
+    return [command.name for command in main.task_app.registered_commands]
+
+
+def test_sniff_subcommand_skips_options_and_unknown_names():
+    """
+    測試 _sniff_subcommand 略過選項、只回傳已知的子命令。
+    """
+    assert main._sniff_subcommand(["--help"], main.APP_COMMANDS) is None
+    assert main._sniff_subcommand(["task", "add", "x"], main.APP_COMMANDS) == "task"
+    assert main._sniff_subcommand(["-s", "todo", "list"], main.TASK_COMMANDS) is None
+    assert main._sniff_subcommand(["lst"], main.TASK_COMMANDS) is None
+
+
+def test_command_registers_only_the_invoked_task_subcommand(monkeypatch):
+    """
+    測試 `task <sub>` 只註冊該子命令；名稱打錯或未指定時註冊全部，讓 Typer 能列出提示。
+    """
+    assert _register_task_commands(monkeypatch, ["task", "add", "描述", "-id", "math"]) == ["add"]
+    assert _register_task_commands(monkeypatch, ["task", "lst"]) == list(main.TASK_COMMANDS)
+    assert _register_task_commands(monkeypatch, ["task"]) == list(main.TASK_COMMANDS)
+
+
+def test_cli_typo_still_suggests_the_intended_command():
+    """
+    測試實際執行 CLI 時，打錯的子命令仍會得到 Typer 的建議。
+    """
+    import os
+    import subprocess
+
+    result = subprocess.run(
+        [sys.executable, str(project_root / "main.py"), "task", "lst"],
+        capture_output=True, text=True, encoding='utf-8', env={**os.environ, "PYTHONUTF8": "1", "COLUMNS": "200"}
+    )
+    assert result.returncode == 2
+    assert "Did you mean 'list'?" in result.stdout + result.stderr
+
+
+def test_add_batch_cli_adds_tasks_and_rejects_bad_field_types(data_dir):
+    """
+    測試從標準輸入傳入 JSON 給 `task add-batch`：合法的批次一次寫入；
+    欄位型別錯誤時以錯誤碼 1 結束，且不寫入任何任務。
+    """
+    import json
+    from typer.testing import CliRunner
+
+    runner = CliRunner()
+    main.save_data(main.TASKS_FILE, [])
+
+    payload = [
+        {"description": "批次任務一", "subject_id": "math"},
+        {"description": "批次任務二", "subject_id": "eng", "task_type": "Wellbeing", "due_date": "2026-12-01"},
+    ]
+    result = runner.invoke(main.app, ["task", "add-batch"], input=json.dumps(payload))
+    assert result.exit_code == 0, result.output
+    saved = main._read_data(main.TASKS_FILE)
+    assert [(t['task_id'], t['type'], t['due_date']) for t in saved] == [(1, "study", None), (2, "wellbeing", "2026-12-01")]
+
+    for bad_item in (
+        {"description": "a", "subject_id": "math", "task_type": None},
+        {"description": "a", "subject_id": "math", "due_date": 20261201},
+        {"description": "a", "subject_id": ["math"]},
+        "不是物件",
+    ):
+        result = runner.invoke(main.app, ["task", "add-batch"], input=json.dumps([bad_item]))
+        assert result.exit_code == 1
+        assert "錯誤" in result.output
+    assert main._read_data(main.TASKS_FILE) == saved
+
+
+def test_add_task_warns_once_when_tasks_file_is_missing(data_dir, capsys):
+    """
+    測試 tasks.json 不存在時，add_task 只顯示一次「找不到檔案」的警告，並建立檔案。
+    """
+    main.add_task("第一個任務", subject_id="math", task_type="study", resource_code=None, due_date=None)
+
+    assert capsys.readouterr().out.count("找不到檔案") == 1
+    assert [task['task_id'] for task in main._read_data(main.TASKS_FILE)] == [1]
+
+
+def test_get_tasks_warns_once_when_tasks_file_is_missing(data_dir, capsys):
+    """
+    測試 tasks.json 不存在時，get_tasks 回傳空列表並顯示一次警告，且不與 load_data 的快取共用列表。
+    """
+    tasks = main.get_tasks()
+    tasks.append(main.build_task(1, "記憶體中的任務", "math"))
+
+    assert main.load_data(main.TASKS_FILE) == []
+    assert capsys.readouterr().out.count("找不到檔案") == 1
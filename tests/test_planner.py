@@ -0,0 +1,50 @@
+# tests/test_planner.py
+
+import sys
+from pathlib import Path
+from datetime import date, timedelta
+
+# 將專案根目錄添加到 Python 路徑中，以便 pytest 可以找到 planner 模組
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from planner import get_daily_plan
+
+def _task(task_id, next_review_date, status='todo', review_interval=0):
+    return {"task_id": task_id, "status": status, "review_interval": review_interval,
+            "next_review_date": next_review_date}
+
+def test_daily_plan_splits_review_and_new_tasks():
+    """
+    測試到期或逾期的任務歸入複習，從未複習過的待辦任務歸入新任務。
+    """
+    today = date.today()
+    tasks = [
+        _task(1, (today - timedelta(days=3)).isoformat(), status='done', review_interval=3),
+        _task(2, today.isoformat(), status='done', review_interval=1),
+        _task(3, (today + timedelta(days=5)).isoformat(), status='done', review_interval=7),
+        _task(4, None),
+        _task(5, None, status='doing'),
+    ]
+
+    plan = get_daily_plan(tasks)
+
+    assert [t['task_id'] for t in plan['review_tasks']] == [1, 2]
+    assert [t['task_id'] for t in plan['new_tasks']] == [4]
+
+
+def test_daily_plan_skips_malformed_review_dates():
+    """
+    測試格式不正確的複習日期一律忽略，即使其字串排序在今天之後也不會被當成新任務。
+    """
+    tasks = [
+        _task(1, '2000-13-45'),
+        _task(2, '2999/12/01'),
+        _task(3, '2999-13-45'),
+        _task(4, '2999-1-5'),
+        _task(5, 20991201),
+    ]
+
+    plan = get_daily_plan(tasks)
+
+    assert plan == {"review_tasks": [], "new_tasks": []}
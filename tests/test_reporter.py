@@ -0,0 +1,72 @@
+# tests/test_reporter.py
+
+import json
+import sys
+from pathlib import Path
+from datetime import datetime, timezone
+
+import pytest
+
+# 將專案根目錄添加到 Python 路徑中，以便 pytest 可以找到 reporter 模組
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import reporter
+
+
+@pytest.fixture
+def write_data(tmp_path, monkeypatch):
+    """將 reporter 的資料檔案路徑指向暫存目錄，回傳一個寫入日誌、任務與學科的函式。"""
+    monkeypatch.setattr(reporter, "LOG_FILE", tmp_path / "log.json")
+    monkeypatch.setattr(reporter, "TASKS_FILE", tmp_path / "tasks.json")
+    monkeypatch.setattr(reporter, "SUBJECTS_FILE", tmp_path / "subjects.json")
+
+    def write(logs):
+        reporter.LOG_FILE.write_text(json.dumps({"logs": logs}), encoding='utf-8')
+        reporter.TASKS_FILE.write_text(json.dumps([
+            {"task_id": 1, "subject_id": "math"},
+            {"task_id": 2, "subject_id": "eng"},
+        ]), encoding='utf-8')
+        reporter.SUBJECTS_FILE.write_text(json.dumps({"subjects": [
+            {"id": "math", "name": "數學"},
+            {"id": "eng", "name": "英文"},
+        ]}), encoding='utf-8')
+    return write
+
+
+def _log(task_id, timestamp, minutes, performance="ok"):
+    return {"task_id": task_id, "timestamp": timestamp, "duration_minutes": minutes, "performance": performance}
+
+
+def test_weekly_report_ignores_malformed_timestamps(write_data):
+    """
+    測試時間戳記格式不正確的紀錄不計入本週，即使其字串排序在本週起始日之後。
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    write_data([
+        _log(1, now, 60),
+        _log(2, "unknown", 45, performance="bad"),
+        _log(2, "2026/01/01T00:00:00", 30, performance="bad"),
+        _log(2, "9999-99-99T00:00:00", 30, performance="bad"),
+    ])
+
+    report = reporter.generate_weekly_report_ascii()
+
+    assert "數學" in report
+    assert "英文" not in report
+    assert "🔥" not in report
+
+
+def test_weekly_report_draws_no_bar_for_negative_minutes(write_data):
+    """
+    測試某科的總時長為負數時不畫出長條，與其他科目的長條互不影響。
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    write_data([_log(1, now, 60), _log(2, now, -30)])
+
+    lines = reporter.generate_weekly_report_ascii().splitlines()
+    math_line = next(line for line in lines if line.startswith("數學"))
+    eng_line = next(line for line in lines if line.startswith("英文"))
+
+    assert math_line.count("█") == reporter.MAX_BAR_WIDTH
+    assert "█" not in eng_line
@@ -89,4 +89,23 @@ def test_update_schedule_good_performance_at_last_box():
 
     assert updated_task['last_review_date'] == today.isoformat()
     assert updated_task['review_interval'] == expected_interval
-    assert updated_task['next_review_date'] == expected_next_review_date.isoformat()
\ No newline at end of file
+    assert updated_task['next_review_date'] == expected_next_review_date.isoformat()
+
+def test_update_schedule_good_performance_unknown_interval_resets():
+    """
+    測試 'good' 表現，當任務的間隔不在預設序列中時，重設回第一個盒子。
+    """
+    today = datetime.now().date()
+    task = {
+        "task_id": 5,
+        "review_interval": 5 # 不在 LEITNER_INTERVALS 中
+    }
+    
+    updated_task = update_review_schedule(task, "good")
+    
+    expected_interval = LEITNER_INTERVALS[0] # 1
+    expected_next_review_date = today + timedelta(days=expected_interval)
+
+    assert updated_task['last_review_date'] == today.isoformat()
+    assert updated_task['review_interval'] == expected_interval
+    assert updated_task['next_review_date'] == expected_next_review_date.isoformat()